@@ -1,5 +1,5 @@
 """
-OpenAI Realtime API agent configuration including prompt and tool definitions.
+OpenAI Realtime API agent configuration including prompt, tool definitions and tool output whitelists.
 """
 
 # Comprehensive system prompt for the customer service AI agent
@@ -129,4 +129,17 @@ TOOLS = [
             "additionalProperties": False
         }
     }
-]
\ No newline at end of file
+]
+
+# Fields of each tool result that are forwarded to the model (dotted paths reach into nested dicts).
+# Anything else (addresses, internal IDs, raw stock counts) is dropped before the
+# function_call_output is sent, keeping the conversation context small.
+TOOL_OUTPUT_FIELDS = {
+    "get_customer_by_email": ["success", "message", "customer.name", "customer.status"],
+    "get_customer_by_phone": ["success", "message", "customer.name", "customer.status"],
+    "get_order": [
+        "success", "message", "order_id", "status", "items", "total",
+        "order_date", "tracking_number", "estimated_delivery"
+    ],
+    "check_inventory": ["success", "message", "product_name", "availability", "price"]
+}
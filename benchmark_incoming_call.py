@@ -0,0 +1,93 @@
+"""
+Benchmark for the /incoming-call webhook.
+
+Measures:
+- cold start: time for a fresh interpreter to import main (what an autoscaled worker pays)
+- throughput: requests per second for /incoming-call, driven in-process through the ASGI app
+
+Usage:
+    python benchmark_incoming_call.py [--requests 5000] [--cold-starts 5]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# main refuses to import without an API key; the benchmark never talks to OpenAI.
+os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+HOST = 'example.ngrok.app'
+
+
+def measure_cold_start(runs):
+    """Return wall-clock seconds for each fresh `import main`."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import main'], check=True, env=os.environ.copy())
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def call_incoming(app):
+    """Send one POST /incoming-call through the ASGI app and return the response body."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'POST',
+        'scheme': 'https',
+        'path': '/incoming-call',
+        'raw_path': b'/incoming-call',
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'content-length', b'0')],
+        'client': ('127.0.0.1', 12345),
+        'server': (HOST, 443),
+    }
+    body = bytearray()
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.body':
+            body.extend(message.get('body', b''))
+
+    await app(scope, receive, send)
+    return bytes(body)
+
+
+async def measure_throughput(app, requests):
+    """Return requests per second for sequential /incoming-call requests."""
+    # Warm up routing and the TwiML cache before timing.
+    sample = await call_incoming(app)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call_incoming(app)
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--cold-starts', type=int, default=5)
+    args = parser.parse_args()
+
+    cold = measure_cold_start(args.cold_starts)
+    print(f"[BENCH] Cold start (import main) over {len(cold)} runs: "
+          f"median {statistics.median(cold)*1000:.0f}ms, min {min(cold)*1000:.0f}ms")
+
+    from main import app
+    rps, sample = asyncio.run(measure_throughput(app, args.requests))
+    print(f"[BENCH] /incoming-call: {rps:.0f} req/s over {args.requests} requests")
+    print(f"[BENCH] Sample response: {sample.decode()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Conversation context budget management for long calls.
+
+Tracks the items in the realtime conversation with an approximate token cost, and
+once the budget is exceeded deletes the oldest ones (`conversation.item.delete`),
+folding whatever text they carried into a single compact summary item. Tool
+results are projected down to per-tool field whitelists before they are sent.
+"""
+
+from agent_config import TOOL_OUTPUT_FIELDS
+
+# Approximate token budget for the items we keep in the conversation
+CONTEXT_TOKEN_BUDGET = 6000
+# The most recent items are never pruned, so the current exchange stays intact
+KEEP_RECENT_ITEMS = 8
+# Upper bound on the running summary that replaces pruned items
+MAX_SUMMARY_CHARS = 1500
+
+# Rough realtime token rates: caller audio ~1 token/100ms, agent audio ~1 token/50ms
+USER_AUDIO_TOKENS_PER_MS = 1 / 100
+ASSISTANT_AUDIO_TOKENS_PER_BYTE = 20 / 8000  # g711 μ-law is 8000 bytes per second
+CHARS_PER_TOKEN = 4
+ITEM_OVERHEAD_TOKENS = 4
+
+SUMMARY_ITEM_PREFIX = 'ctx_summary_'
+ALWAYS_KEPT_FIELDS = ("success", "message", "error")
+
+
+def project_tool_output(tool_name, result):
+    """Keep only the whitelisted fields of a tool result (errors and status always pass through)."""
+    fields = TOOL_OUTPUT_FIELDS.get(tool_name)
+    if fields is None or not isinstance(result, dict):
+        return result
+
+    projected = {}
+    for path in list(ALWAYS_KEPT_FIELDS) + fields:
+        source, target = result, projected
+        *parents, leaf = path.split('.')
+        for key in parents:
+            source = source.get(key) if isinstance(source, dict) else None
+            target = target.setdefault(key, {})
+        if isinstance(source, dict) and leaf in source:
+            target[leaf] = source[leaf]
+
+    # Drop nested containers that ended up empty (e.g. no customer on a failed lookup)
+    return {key: value for key, value in projected.items() if value != {}}
+
+
+def _text_tokens(text):
+    return len(text or '') / CHARS_PER_TOKEN
+
+
+class ConversationContext:
+    """
+    Approximate view of one call's realtime conversation.
+
+    Feed every server event to `observe()`; call `prune()` between responses to get the
+    client events (deletes plus a refreshed summary) that bring the context back under budget.
+    """
+
+    def __init__(self, token_budget=CONTEXT_TOKEN_BUDGET, keep_recent=KEEP_RECENT_ITEMS):
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        # item_id -> {"type", "role", "call_id", "audio_tokens", "text_tokens", "tokens", "text"}, in conversation order
+        self.items = {}
+        self.summary_lines = []
+        self.summary_item_id = None
+        self.summary_count = 0
+        self.speech_start_ms = {}
+        # Caller audio duration measured before its item was added
+        self.pending_user_audio_ms = {}
+
+    @property
+    def total_tokens(self):
+        return sum(item["tokens"] for item in self.items.values())
+
+    def observe(self, event):
+        """Update item tracking from a realtime server event."""
+        event_type = event.get('type')
+
+        if event_type in ('conversation.item.added', 'conversation.item.created', 'conversation.item.done'):
+            self._track_item(event.get('item') or {})
+        elif event_type == 'conversation.item.input_audio_transcription.completed':
+            item = self.items.get(event.get('item_id'))
+            if item is not None and event.get('transcript'):
+                item["text"] = f"user: {event['transcript'].strip()}"
+                item["text_tokens"] = _text_tokens(item["text"])
+                self._refresh_tokens(item)
+        elif event_type == 'conversation.item.deleted':
+            self.items.pop(event.get('item_id'), None)
+        elif event_type == 'response.output_audio.delta':
+            item = self.items.get(event.get('item_id'))
+            if item is not None:
+                # base64 carries 3 bytes per 4 characters; no need to decode just to count
+                item["audio_tokens"] += len(event.get('delta', '')) * 3 / 4 * ASSISTANT_AUDIO_TOKENS_PER_BYTE
+                self._refresh_tokens(item)
+        elif event_type == 'input_audio_buffer.speech_started':
+            self.speech_start_ms[event.get('item_id')] = event.get('audio_start_ms', 0)
+        elif event_type == 'input_audio_buffer.speech_stopped':
+            start_ms = self.speech_start_ms.pop(event.get('item_id'), None)
+            if start_ms is None:
+                return
+            duration_ms = event.get('audio_end_ms', start_ms) - start_ms
+            item = self.items.get(event.get('item_id'))
+            if item is not None:
+                item["audio_tokens"] = duration_ms * USER_AUDIO_TOKENS_PER_MS
+                self._refresh_tokens(item)
+            else:
+                # The item is usually added after speech stops; remember the duration for it
+                self.pending_user_audio_ms[event.get('item_id')] = duration_ms
+
+    def prune(self):
+        """Return the client events needed to get back under the token budget (may be empty)."""
+        if self.total_tokens <= self.token_budget:
+            return []
+
+        older = list(self.items.items())
+        if self.keep_recent:
+            older = older[:-self.keep_recent]
+        # Caller audio without a transcript (yet) is kept: deleting it would lose what they said
+        candidates = {
+            item_id for item_id, item in older
+            if item_id != self.summary_item_id and (item["text"] or item["role"] != 'user')
+        }
+
+        # A function_call and its output are deleted together or not at all
+        units = []
+        seen = set()
+        for item_id, item in older:
+            if item_id not in candidates or item_id in seen:
+                continue
+            unit = [item_id]
+            if item["call_id"]:
+                unit = [other_id for other_id, other in self.items.items() if other["call_id"] == item["call_id"]]
+                if not candidates.issuperset(unit):
+                    continue
+            seen.update(unit)
+            units.append(unit)
+
+        events = []
+        removed_tokens = 0
+        for unit in units:
+            if self.total_tokens <= self.token_budget:
+                break
+            for item_id in unit:
+                item = self.items.pop(item_id)
+                removed_tokens += item["tokens"]
+                if item["text"]:
+                    self.summary_lines.append(item["text"])
+                events.append({"type": "conversation.item.delete", "item_id": item_id})
+
+        if not events:
+            return []
+
+        print(f"[CONTEXT] Pruning {len(events)} items (~{removed_tokens:.0f} tokens), "
+              f"{len(self.items)} items (~{self.total_tokens:.0f} tokens) remain")
+        return events + self._refresh_summary()
+
+    def handoff(self):
+        """
+        Carry the conversation over to a fresh realtime session.
+
+        Folds every tracked item into the running summary, forgets the old session's
+        items and returns the events that recreate the summary in the new session.
+        """
+        # The summary item's own text is already in summary_lines
+        self.summary_lines.extend(
+            item["text"] for item_id, item in self.items.items()
+            if item["text"] and item_id != self.summary_item_id
+        )
+        self.items.clear()
+        self.speech_start_ms.clear()
+        self.pending_user_audio_ms.clear()
+        # The old summary item went away with the old session
+        self.summary_item_id = None
+        return self._refresh_summary()
+
+    def _track_item(self, item):
+        item_id = item.get('id')
+        if not item_id:
+            return
+
+        tracked = self.items.get(item_id)
+        if tracked is None:
+            tracked = self.items[item_id] = {
+                "type": item.get('type'),
+                "role": item.get('role'),
+                "call_id": item.get('call_id'),
+                "audio_tokens": 0,
+                "text_tokens": 0,
+                "tokens": ITEM_OVERHEAD_TOKENS,
+                "text": "",
+            }
+            pending_ms = self.pending_user_audio_ms.pop(item_id, None)
+            if pending_ms is not None:
+                tracked["audio_tokens"] = pending_ms * USER_AUDIO_TOKENS_PER_MS
+
+        text = self._item_text(item)
+        if text:
+            tracked["text"] = text
+            tracked["text_tokens"] = _text_tokens(text)
+        self._refresh_tokens(tracked)
+
+    def _item_text(self, item):
+        """Compact text form of an item, used both for token estimates and the summary."""
+        item_type = item.get('type')
+        if item_type == 'function_call':
+            return f"Tool call {item.get('name')}({item.get('arguments', '')})"
+        if item_type == 'function_call_output':
+            return f"Tool result: {item.get('output', '')}"
+
+        parts = []
+        for content in item.get('content') or []:
+            text = content.get('text') or content.get('transcript')
+            if text:
+                parts.append(text)
+        if not parts:
+            return ""
+        return f"{item.get('role', 'unknown')}: {' '.join(parts)}"
+
+    def _refresh_tokens(self, item):
+        item["tokens"] = ITEM_OVERHEAD_TOKENS + item["audio_tokens"] + item["text_tokens"]
+
+    def _refresh_summary(self):
+        """Replace the previous summary item with one covering everything pruned so far."""
+        events = []
+        if self.summary_item_id:
+            self.items.pop(self.summary_item_id, None)
+            events.append({"type": "conversation.item.delete", "item_id": self.summary_item_id})
+            self.summary_item_id = None
+
+        summary = "\n".join(self.summary_lines)
+        if len(summary) > MAX_SUMMARY_CHARS:
+            # Keep the most recent part; older context matters least
+            summary = summary[-MAX_SUMMARY_CHARS:]
+            self.summary_lines = [summary]
+        if not summary:
+            return events
+
+        self.summary_count += 1
+        self.summary_item_id = f"{SUMMARY_ITEM_PREFIX}{self.summary_count}"
+        events.append({
+            "type": "conversation.item.create",
+            # Insert the summary at the start of the conversation, ahead of the kept items
+            "previous_item_id": "root",
+            "item": {
+                "id": self.summary_item_id,
+                "type": "message",
+                "role": "system",
+                "content": [
+                    {
+                        "type": "input_text",
+                        "text": f"Summary of earlier parts of this call:\n{summary}"
+                    }
+                ]
+            }
+        })
+        return events
@@ -0,0 +1,94 @@
+"""
+Local stand-in for the OpenAI Realtime API, for exercising session reconnects.
+
+Answers session.update, conversation.item.create and response.create with the
+matching server events (responses are a short burst of silent μ-law audio), and
+drops the connection on cue after a number of caller audio frames.
+
+Usage:
+    python fake_realtime_server.py [--port 8765] [--drop-after-frames 100] [--drops 1]
+    OPENAI_REALTIME_URL=ws://localhost:8765 OPENAI_WARM_POOL_SIZE=0 python main.py
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import websockets
+
+SILENCE_FRAME = base64.b64encode(b'\xff' * 160).decode('utf-8')
+
+ids = itertools.count(1)
+
+
+def new_id(prefix):
+    return f"{prefix}_{next(ids)}"
+
+
+async def send_response(connection):
+    """Emit a minimal audio response."""
+    response_id, item_id = new_id('resp'), new_id('item')
+    await connection.send(json.dumps({"type": "response.created", "response": {"id": response_id}}))
+    await connection.send(json.dumps({
+        "type": "conversation.item.added",
+        "item": {"id": item_id, "type": "message", "role": "assistant", "content": []}
+    }))
+    for _ in range(5):
+        await connection.send(json.dumps({
+            "type": "response.output_audio.delta",
+            "response_id": response_id,
+            "item_id": item_id,
+            "delta": SILENCE_FRAME
+        }))
+    await connection.send(json.dumps({"type": "response.done", "response": {"id": response_id}}))
+
+
+async def serve(port, drop_after_frames, drops):
+    remaining_drops = drops
+
+    async def handle(connection):
+        nonlocal remaining_drops
+        session_number = next(ids)
+        print(f"[FAKE REALTIME] Session {session_number} opened")
+        await connection.send(json.dumps({"type": "session.created", "session": {}}))
+        frames = 0
+        async for message in connection:
+            event = json.loads(message)
+            event_type = event.get('type')
+            if event_type == 'session.update':
+                await connection.send(json.dumps({"type": "session.updated", "session": event.get('session', {})}))
+            elif event_type == 'conversation.item.create':
+                item = dict(event.get('item', {}))
+                item.setdefault('id', new_id('item'))
+                await connection.send(json.dumps({"type": "conversation.item.added", "item": item}))
+            elif event_type == 'conversation.item.delete':
+                await connection.send(json.dumps({"type": "conversation.item.deleted", "item_id": event.get('item_id')}))
+            elif event_type == 'response.create':
+                await send_response(connection)
+            elif event_type == 'input_audio_buffer.append':
+                frames += 1
+                if drop_after_frames and remaining_drops and frames >= drop_after_frames:
+                    remaining_drops -= 1
+                    print(f"[FAKE REALTIME] Dropping session {session_number} after {frames} audio frames")
+                    await connection.close(code=1011, reason="fake server drop")
+                    return
+        print(f"[FAKE REALTIME] Session {session_number} closed after {frames} audio frames")
+
+    async with websockets.serve(handle, "localhost", port):
+        print(f"[FAKE REALTIME] Listening on ws://localhost:{port}")
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--drop-after-frames', type=int, default=100,
+                        help="close each session after this many caller audio frames (0 never drops)")
+    parser.add_argument('--drops', type=int, default=1, help="how many sessions to drop in total")
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.drop_after_frames, args.drops))
+
+
+if __name__ == "__main__":
+    main()
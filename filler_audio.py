@@ -0,0 +1,95 @@
+"""
+Locally generated hold/filler audio played while slow tools run.
+
+Clips are raw 8kHz G.711 μ-law files (the format Twilio Media Streams expects),
+stored per voice as `<FILLER_AUDIO_DIR>/<voice>/*.ulaw` and loaded once at startup.
+No model calls are needed to play them.
+"""
+
+import asyncio
+import os
+from pathlib import Path
+
+FILLER_AUDIO_DIR = os.getenv('FILLER_AUDIO_DIR', 'filler_clips')
+# Tool calls slower than this get filler audio
+FILLER_THRESHOLD_MS = int(os.getenv('FILLER_THRESHOLD_MS', 700))
+# Pause between clips if the tool is still running after one finished
+FILLER_REPEAT_GAP_MS = 3000
+
+FRAME_SIZE = 160  # 20ms of 8kHz μ-law, same frame size as model audio
+FRAME_DURATION_S = 0.02
+
+_clip_cache = {}
+
+
+def load_filler_clips(voice, audio_dir=FILLER_AUDIO_DIR):
+    """Load (and cache) the μ-law clips recorded for `voice`; empty if there are none."""
+    key = (voice, audio_dir)
+    if key not in _clip_cache:
+        voice_dir = Path(audio_dir) / voice
+        clips = [path.read_bytes() for path in sorted(voice_dir.glob('*.ulaw'))] if voice_dir.is_dir() else []
+        print(f"[FILLER] Loaded {len(clips)} filler clips for voice '{voice}' from {voice_dir}")
+        _clip_cache[key] = [clip for clip in clips if clip]
+    return _clip_cache[key]
+
+
+class FillerPlayer:
+    """
+    Plays filler clips for one call.
+
+    `send_frame` is the call's outgoing frame sender (an async callable taking raw
+    μ-law bytes). Frames are paced in real time so a `clear` only has to drop a
+    few frames already buffered at Twilio.
+    """
+
+    def __init__(self, clips, send_frame, threshold_ms=FILLER_THRESHOLD_MS):
+        self.clips = clips
+        self.send_frame = send_frame
+        self.threshold_ms = threshold_ms
+        self.next_clip = 0
+        self.task = None
+        self.played = False
+
+    @property
+    def active(self):
+        return self.task is not None
+
+    def start(self):
+        """Arm the filler for a tool call that just started; plays only if it runs past the threshold."""
+        if self.task is None and self.clips:
+            self.played = False
+            self.task = asyncio.ensure_future(self._play())
+
+    async def cancel_if_not_played(self):
+        """The tool finished: drop a filler still waiting for the threshold, keep one already playing."""
+        if self.task is not None and not self.played:
+            await self.stop()
+
+    async def stop(self):
+        """
+        Stop the filler.
+
+        Returns:
+            bool: True if filler audio reached Twilio and should be cleared
+        """
+        if self.task is None:
+            return False
+        task, self.task = self.task, None
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return self.played
+
+    async def _play(self):
+        await asyncio.sleep(self.threshold_ms / 1000)
+        while True:
+            clip = self.clips[self.next_clip % len(self.clips)]
+            self.next_clip += 1
+            print(f"[FILLER] Tool still running after {self.threshold_ms}ms, playing filler clip")
+            self.played = True
+            loop = asyncio.get_event_loop()
+            started = loop.time()
+            for index, offset in enumerate(range(0, len(clip), FRAME_SIZE)):
+                await self.send_frame(clip[offset:offset + FRAME_SIZE])
+                # Pace against the clip start so send time does not accumulate drift
+                await asyncio.sleep(max(0, started + (index + 1) * FRAME_DURATION_S - loop.time()))
+            await asyncio.sleep(FILLER_REPEAT_GAP_MS / 1000)
@@ -0,0 +1,100 @@
+"""
+Generate the filler clips played while slow tools run.
+
+Synthesizes each phrase once with OpenAI text-to-speech, downsamples it to 8kHz and
+encodes it as raw G.711 μ-law into `<FILLER_AUDIO_DIR>/<voice>/`, where main.py
+loads it at startup. Run it once per voice; no model calls happen during calls.
+
+Usage:
+    python generate_filler_clips.py [--voice cedar] [--overwrite]
+"""
+
+import argparse
+import os
+import re
+from pathlib import Path
+import requests
+from dotenv import load_dotenv
+from filler_audio import FILLER_AUDIO_DIR
+
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+TTS_URL = "https://api.openai.com/v1/audio/speech"
+TTS_MODEL = os.getenv('FILLER_TTS_MODEL', 'gpt-4o-mini-tts')
+TTS_SAMPLE_RATE = 24000  # `pcm` responses are 24kHz 16-bit little-endian mono
+TARGET_SAMPLE_RATE = 8000
+
+FILLER_PHRASES = [
+    "One moment while I look that up.",
+    "Bear with me, I'm just checking that for you.",
+    "Thanks for your patience, this is taking a second.",
+]
+
+MULAW_BIAS = 0x21  # on the 14-bit magnitude
+MULAW_CLIP = 8159
+
+
+def linear_to_mulaw(sample):
+    """Encode one signed 16-bit sample as G.711 μ-law (same output as the reference encoder)."""
+    pcm = sample >> 2
+    if pcm < 0:
+        pcm, mask = -pcm, 0x7F
+    else:
+        mask = 0xFF
+    pcm = min(pcm, MULAW_CLIP) + MULAW_BIAS
+    segment = max(pcm.bit_length() - 6, 0)
+    if segment > 7:
+        return 0x7F ^ mask
+    return ((segment << 4) | ((pcm >> (segment + 1)) & 0x0F)) ^ mask
+
+
+def pcm16_to_mulaw_8k(pcm):
+    """Downsample 24kHz PCM16 to 8kHz (averaging each group of 3 samples) and encode as μ-law."""
+    samples = memoryview(pcm[:len(pcm) - len(pcm) % 2]).cast('h')
+    step = TTS_SAMPLE_RATE // TARGET_SAMPLE_RATE
+    return bytes(
+        linear_to_mulaw(sum(samples[i:i + step]) // step)
+        for i in range(0, len(samples) - step + 1, step)
+    )
+
+
+def synthesize(text, voice):
+    """Return 24kHz PCM16 audio for `text`."""
+    response = requests.post(
+        TTS_URL,
+        headers={"Authorization": f"Bearer {OPENAI_API_KEY}"},
+        json={"model": TTS_MODEL, "voice": voice, "input": text, "response_format": "pcm"},
+        timeout=60
+    )
+    response.raise_for_status()
+    return response.content
+
+
+def clip_name(text):
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')[:40] + '.ulaw'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--voice', default='cedar')
+    parser.add_argument('--overwrite', action='store_true')
+    args = parser.parse_args()
+
+    if not OPENAI_API_KEY:
+        raise ValueError('Missing the OpenAI API key. Please set it in the .env file.')
+
+    voice_dir = Path(FILLER_AUDIO_DIR) / args.voice
+    voice_dir.mkdir(parents=True, exist_ok=True)
+    for text in FILLER_PHRASES:
+        path = voice_dir / clip_name(text)
+        if path.exists() and not args.overwrite:
+            print(f"[FILLER] Keeping existing {path}")
+            continue
+        clip = pcm16_to_mulaw_8k(synthesize(text, args.voice))
+        path.write_bytes(clip)
+        print(f"[FILLER] Wrote {path} ({len(clip) / TARGET_SAMPLE_RATE:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
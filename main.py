@@ -3,14 +3,19 @@ import os
 import json
 import base64
 import asyncio
+from functools import lru_cache
+from xml.sax.saxutils import quoteattr
 import websockets
 from fastapi import FastAPI, WebSocket, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.websockets import WebSocketDisconnect
-from twilio.twiml.voice_response import VoiceResponse, Connect, Say, Stream
 from dotenv import load_dotenv
 from agent_config import SYSTEM_MESSAGE, TOOLS
-from function_handlers import handle_function_call
+from tool_resilience import ResilientToolRunner
+from turn_detection import TurnDetectionController
+from conversation_context import ConversationContext, project_tool_output
+from filler_audio import FillerPlayer, load_filler_clips
+from realtime_session import AudioRingBuffer, CallState, RealtimeConnectionPool
 
 load_dotenv()
 
@@ -18,7 +23,18 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 PORT = int(os.getenv('PORT', 5050))
 TEMPERATURE = float(os.getenv('TEMPERATURE', 0.7))
+# When disabled, VAD decisions are still logged (shadow mode) but never sent to OpenAI
+ADAPTIVE_VAD = os.getenv('ADAPTIVE_VAD', 'true').lower() == 'true'
+OPENAI_REALTIME_URL = os.getenv(
+    'OPENAI_REALTIME_URL',
+    f"wss://api.openai.com/v1/realtime?model=gpt-realtime&temperature={TEMPERATURE}"
+)
+# Pre-opened OpenAI connections kept ready for new calls and reconnects
+OPENAI_WARM_POOL_SIZE = int(os.getenv('OPENAI_WARM_POOL_SIZE', 1))
+MAX_RECONNECT_ATTEMPTS = 3
+RECONNECT_BACKOFF_S = 0.25
 VOICE = 'cedar'
+INPUT_TRANSCRIPTION_MODEL = os.getenv('INPUT_TRANSCRIPTION_MODEL', 'gpt-4o-mini-transcribe')
 LOG_EVENT_TYPES = [
     'error', 'response.content.done', 'rate_limits.updated',
     'response.done', 'input_audio_buffer.committed',
@@ -26,45 +42,67 @@ LOG_EVENT_TYPES = [
     'session.created', 'session.updated'
 ]
 SHOW_TIMING_MATH = False
+# Hold/filler clips for the configured voice, loaded once at startup
+FILLER_CLIPS = load_filler_clips(VOICE)
+MEDIA_STREAM_PATH = '/media-stream'
+# Same document twilio's VoiceResponse/Connect/Stream builders would render, kept
+# as a template so the twilio SDK is not imported (or rebuilt) on every call.
+TWIML_CONNECT_TEMPLATE = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Response><Connect><Stream url={url} /></Connect></Response>'
+)
 
 app = FastAPI()
 
 if not OPENAI_API_KEY:
     raise ValueError('Missing the OpenAI API key. Please set it in the .env file.')
 
+openai_pool = RealtimeConnectionPool(
+    OPENAI_REALTIME_URL,
+    {"Authorization": f"Bearer {OPENAI_API_KEY}"},
+    size=OPENAI_WARM_POOL_SIZE
+)
+
 @app.get("/", response_class=JSONResponse)
 async def index_page():
     return {"message": "Twilio Media Stream Server is running!"}
 
+@lru_cache(maxsize=128)
+def render_connect_twiml(host: str, path: str = MEDIA_STREAM_PATH) -> str:
+    """Render (and cache per host/stream path) the TwiML that connects a call to the Media Stream."""
+    return TWIML_CONNECT_TEMPLATE.format(url=quoteattr(f'wss://{host}{path}'))
+
 @app.api_route("/incoming-call", methods=["GET", "POST"])
 async def handle_incoming_call(request: Request):
     """Handle incoming call and return TwiML response to connect to Media Stream."""
-    response = VoiceResponse()
-    # response.say(
-    #     "You are connected to the A. I. voice assistant, powered by Twilio and the Open A I Realtime API",
-    #     voice="Google.en-US-Chirp3-HD-Aoede"
-    # )
+    # To greet the caller before connecting, add e.g.
+    # <Say voice="Google.en-US-Chirp3-HD-Aoede">...</Say> ahead of <Connect> in the template.
     host = request.url.hostname
-    connect = Connect()
-    connect.stream(url=f'wss://{host}/media-stream')
-    response.append(connect)
-    return HTMLResponse(content=str(response), media_type="application/xml")
+    return Response(content=render_connect_twiml(host), media_type="application/xml")
 
-@app.websocket("/media-stream")
+@app.websocket(MEDIA_STREAM_PATH)
 async def handle_media_stream(websocket: WebSocket):
     """Handle WebSocket connections between Twilio and OpenAI."""
     print("Client connected")
     await websocket.accept()
 
-    async with websockets.connect(
-        f"wss://api.openai.com/v1/realtime?model=gpt-realtime&temperature={TEMPERATURE}",
-        additional_headers={
-            "Authorization": f"Bearer {OPENAI_API_KEY}"
-        }
-    ) as openai_ws:
-        await initialize_session(openai_ws)
+    openai_ws = await openai_pool.acquire()
+    try:
+        # Per-call turn detection controller (VAD parameters adapt to the line and caller)
+        turn_detection = TurnDetectionController(adaptive=ADAPTIVE_VAD)
+        await initialize_session(openai_ws, turn_detection.turn_detection())
+        # Tracks conversation items so long calls stay within a token budget
+        conversation_context = ConversationContext()
+        # Survives OpenAI reconnects: verification state, recent tool results and caller audio during the gap
+        call_state = CallState()
+        caller_audio_ring = AudioRingBuffer()
+        openai_ready = True
+        call_ended = False
+        response_in_progress = False
 
         # Connection specific state
+        arg_buffers = defaultdict(list)
+        completed_function_calls = []  # Buffer for function calls waiting for response.done
         stream_sid = None
         latest_media_timestamp = 0
         last_assistant_item = None
@@ -78,23 +116,22 @@ async def handle_media_stream(websocket: WebSocket):
         # Timing measurement for response latency
         user_speech_stopped_time = None
         agent_response_started_time = None
+        # speech_stopped time claimed by the response created right after it (None for tool follow-ups)
+        response_speech_stopped_time = None
         
         async def receive_from_twilio():
             """Receive audio data from Twilio and send it to the OpenAI Realtime API."""
-            nonlocal stream_sid, latest_media_timestamp
+            nonlocal stream_sid, latest_media_timestamp, call_ended
             try:
                 async for message in websocket.iter_text():
                     data = json.loads(message)
-                    if data['event'] == 'media' and openai_ws.state.name == 'OPEN':
+                    if data['event'] == 'media':
                         latest_media_timestamp = int(data['media']['timestamp'])
-                        audio_append = {
-                            "type": "input_audio_buffer.append",
-                            "audio": data['media']['payload']
-                        }
-                        await openai_ws.send(json.dumps(audio_append))
+                        await forward_caller_audio(data['media']['payload'])
                     elif data['event'] == 'start':
                         stream_sid = data['start']['streamSid']
                         print(f"Incoming stream has started {stream_sid}")
+                        turn_detection.call_id = stream_sid
                         response_start_timestamp_twilio = None
                         latest_media_timestamp = 0
                         last_assistant_item = None
@@ -105,152 +142,194 @@ async def handle_media_stream(websocket: WebSocket):
                         if mark_queue:
                             mark_queue.pop(0)
             except WebSocketDisconnect:
+                pass
+            finally:
+                # iter_text() ends quietly on a normal hangup, so this is where the call is over
                 print("Client disconnected.")
+                call_ended = True
                 if openai_ws.state.name == 'OPEN':
                     await openai_ws.close()
 
         async def send_to_twilio():
             """Receive events from the OpenAI Realtime API, send audio back to Twilio."""
-            nonlocal stream_sid, last_assistant_item, response_start_timestamp_twilio, outgoing_audio_buffer, user_speech_stopped_time, agent_response_started_time
-            try:
-                async for openai_message in openai_ws:
-                    response = json.loads(openai_message)
-                    if response['type'] in LOG_EVENT_TYPES:
-                        print(f"Received event: {response['type']}", response)
+            nonlocal stream_sid, last_assistant_item, response_start_timestamp_twilio, outgoing_audio_buffer, user_speech_stopped_time, agent_response_started_time, response_speech_stopped_time, response_in_progress
+            while not call_ended:
+                try:
+                    async for openai_message in openai_ws:
+                        response = json.loads(openai_message)
+                        conversation_context.observe(response)
+                        # Tracked so a reconnect knows whether a response has to be recreated
+                        if response.get('type') == 'response.created':
+                            response_in_progress = True
+                            # Only the response that directly follows the caller's turn is timed against it
+                            response_speech_stopped_time = user_speech_stopped_time
+                            user_speech_stopped_time = None
+                        elif response.get('type') == 'response.done':
+                            response_in_progress = False
+                            response_speech_stopped_time = None
+                        if response['type'] in LOG_EVENT_TYPES:
+                            print(f"Received event: {response['type']}", response)
                         
-                        # Track when user stops speaking
-                        if response['type'] == 'input_audio_buffer.speech_stopped':
-                            user_speech_stopped_time = asyncio.get_event_loop().time()
-                            print(f"[TIMING] User speech stopped at: {user_speech_stopped_time:.3f}s")
-
-                    if response.get('type') == 'response.output_audio.delta' and 'delta' in response:
-                        # Track when agent starts responding (first audio delta)
-                        if agent_response_started_time is None:
-                            agent_response_started_time = asyncio.get_event_loop().time()
-                            print(f"[TIMING] Agent response started at: {agent_response_started_time:.3f}s")
+                            # Track when user stops speaking
+                            if response['type'] == 'input_audio_buffer.speech_stopped':
+                                user_speech_stopped_time = asyncio.get_event_loop().time()
+                                print(f"[TIMING] User speech stopped at: {user_speech_stopped_time:.3f}s")
+                                await apply_turn_detection_update(turn_detection.on_speech_stopped(user_speech_stopped_time))
+
+                        if response.get('type') == 'response.output_audio.delta' and 'delta' in response:
+                            # Real model audio replaces any filler still playing
+                            if filler.active:
+                                await stop_filler()
+
+                            # Track when agent starts responding (first audio delta)
+                            if agent_response_started_time is None:
+                                agent_response_started_time = asyncio.get_event_loop().time()
+                                print(f"[TIMING] Agent response started at: {agent_response_started_time:.3f}s")
                             
-                            # Calculate and log response latency
-                            if user_speech_stopped_time is not None:
-                                response_latency = agent_response_started_time - user_speech_stopped_time
-                                print(f"[TIMING] Response latency: {response_latency:.3f}s ({response_latency*1000:.0f}ms)")
-                            else:
-                                print(f"[TIMING] No user speech stop time recorded, cannot calculate latency")
+                                # Calculate and log response latency
+                                if response_speech_stopped_time is not None:
+                                    response_latency = agent_response_started_time - response_speech_stopped_time
+                                    # Reported once per response
+                                    response_speech_stopped_time = None
+                                    print(f"[TIMING] Response latency: {response_latency:.3f}s ({response_latency*1000:.0f}ms)")
+                                    await apply_turn_detection_update(turn_detection.on_response_latency(response_latency))
+                                else:
+                                    print(f"[TIMING] No user speech stop time recorded, cannot calculate latency")
                         
-                        # Decode the base64 audio delta from OpenAI
-                        audio_data = base64.b64decode(response['delta'])
+                            # Decode the base64 audio delta from OpenAI
+                            audio_data = base64.b64decode(response['delta'])
                         
-                        # Add to outgoing buffer
-                        outgoing_audio_buffer.extend(audio_data)
+                            # Add to outgoing buffer
+                            outgoing_audio_buffer.extend(audio_data)
                         
-                        # Send complete 160-byte frames to Twilio
-                        while len(outgoing_audio_buffer) >= BUFFER_SIZE:
-                            # Extract 160 bytes from buffer
-                            frame_data = outgoing_audio_buffer[:BUFFER_SIZE]
-                            outgoing_audio_buffer = outgoing_audio_buffer[BUFFER_SIZE:]
-                            
-                            # Encode frame back to base64
-                            frame_payload = base64.b64encode(frame_data).decode('utf-8')
-                            
-                            # Send to Twilio
-                            audio_delta = {
-                                "event": "media",
-                                "streamSid": stream_sid,
-                                "media": {
-                                    "payload": frame_payload
-                                }
-                            }
-                            await websocket.send_json(audio_delta)
-
-
-                        if response.get("item_id") and response["item_id"] != last_assistant_item:
-                            response_start_timestamp_twilio = latest_media_timestamp
-                            last_assistant_item = response["item_id"]
-                            # Reset timing variables for new response
-                            agent_response_started_time = None
-                            if SHOW_TIMING_MATH:
-                                print(f"Setting start timestamp for new response: {response_start_timestamp_twilio}ms")
-
-                        await send_mark(websocket, stream_sid)
-
-                    # Trigger an interruption. Your use case might work better using `input_audio_buffer.speech_stopped`, or combining the two.
-                    if response.get('type') == 'input_audio_buffer.speech_started':
-                        print("Speech started detected.")
-                        if last_assistant_item:
-                            print(f"Interrupting response with id: {last_assistant_item}")
-                            await handle_speech_started_event()
+                            # Send complete 160-byte frames to Twilio
+                            while len(outgoing_audio_buffer) >= BUFFER_SIZE:
+                                # Extract 160 bytes from buffer
+                                frame_data = outgoing_audio_buffer[:BUFFER_SIZE]
+                                outgoing_audio_buffer = outgoing_audio_buffer[BUFFER_SIZE:]
+
+                                # Send to Twilio
+                                await send_audio_frame(frame_data)
+
+
+                            if response.get("item_id") and response["item_id"] != last_assistant_item:
+                                response_start_timestamp_twilio = latest_media_timestamp
+                                last_assistant_item = response["item_id"]
+                                # Reset timing variables for new response
+                                agent_response_started_time = None
+                                if SHOW_TIMING_MATH:
+                                    print(f"Setting start timestamp for new response: {response_start_timestamp_twilio}ms")
+
+                            await send_mark(websocket, stream_sid)
+
+                        # Trigger an interruption. Your use case might work better using `input_audio_buffer.speech_stopped`, or combining the two.
+                        if response.get('type') == 'input_audio_buffer.speech_started':
+                            print("Speech started detected.")
+                            if filler.active:
+                                await stop_filler()
+                            await apply_turn_detection_update(turn_detection.on_speech_started(asyncio.get_event_loop().time()))
+                            if last_assistant_item:
+                                print(f"Interrupting response with id: {last_assistant_item}")
+                                await handle_speech_started_event()
                     
-                    # ---- TOOL CALL HANDLING ----
-                    # a) arguments streaming
-                    if response.get("type") == "response.function_call_arguments.delta":
-                        call_id = response["call_id"]
-                        arg_buffers[call_id].append(response.get("delta", ""))
-                        continue
-
-                    # b) arguments done -> we have full payload and the tool name
-                    if response.get("type") == "response.function_call_arguments.done":
-                        call_id = response["call_id"]
-                        tool_name = response["name"]
-                        full_args = "".join(arg_buffers.pop(call_id, []))  # JSON string
-
-                        try:
-                            args = json.loads(full_args) if full_args else {}
-                        except json.JSONDecodeError:
-                            args = {"_raw": full_args}
-
-                        # run your handler (HTTP/RAG/etc.)
-                        result = await route_tool_call(tool_name, args)
-
-                        # Store the function call result, but don't send yet - wait for response.done
-                        completed_function_calls.append({
-                            "call_id": call_id,
-                            "result": result
-                        })
-                        continue
-
-                    # Handle response.done - flush audio buffer and process function calls if any
-                    if response.get("type") == "response.done":
-                        # Flush any remaining audio buffer when response is done
-                        await flush_audio_buffer()
+                        # ---- TOOL CALL HANDLING ----
+                        # a) arguments streaming
+                        if response.get("type") == "response.function_call_arguments.delta":
+                            call_id = response["call_id"]
+                            arg_buffers[call_id].append(response.get("delta", ""))
+                            continue
+
+                        # b) arguments done -> we have full payload and the tool name
+                        if response.get("type") == "response.function_call_arguments.done":
+                            call_id = response["call_id"]
+                            tool_name = response["name"]
+                            full_args = "".join(arg_buffers.pop(call_id, []))  # JSON string
+
+                            try:
+                                args = json.loads(full_args) if full_args else {}
+                            except json.JSONDecodeError:
+                                args = {"_raw": full_args}
+
+                            # run your handler (HTTP/RAG/etc.); filler audio covers slow tools until the model speaks again
+                            filler.start()
+                            result = await route_tool_call(tool_name, args)
+                            # Fast tools get no filler at all; one already playing runs until model audio arrives
+                            await filler.cancel_if_not_played()
+
+                            # Store the function call result (trimmed to the fields the model needs), but don't send yet - wait for response.done
+                            result = project_tool_output(tool_name, result)
+                            call_state.record_tool_result(tool_name, args, result)
+                            completed_function_calls.append({
+                                "call_id": call_id,
+                                "result": result
+                            })
+                            continue
+
+                        # Handle response.done - flush audio buffer and process function calls if any
+                        if response.get("type") == "response.done":
+                            # Flush any remaining audio buffer when response is done
+                            await flush_audio_buffer()
                         
-                        if completed_function_calls:
-                            print(f"[OPENAI REALTIME] Processing {len(completed_function_calls)} function call results after response.done")
-
-                            # Send all function call outputs
-                            for func_call in completed_function_calls:
-                                function_output_item = {
-                                    "type": "conversation.item.create",
-                                    "item": {
-                                        "type": "function_call_output",
-                                        "call_id": func_call["call_id"],
-                                        "output": json.dumps(func_call["result"])
+                            if completed_function_calls:
+                                print(f"[OPENAI REALTIME] Processing {len(completed_function_calls)} function call results after response.done")
+
+                                # Send all function call outputs
+                                for func_call in completed_function_calls:
+                                    function_output_item = {
+                                        "type": "conversation.item.create",
+                                        "item": {
+                                            "type": "function_call_output",
+                                            "call_id": func_call["call_id"],
+                                            "output": json.dumps(func_call["result"])
+                                        }
                                     }
-                                }
-                                print(f"[OPENAI REALTIME] Sending function call output for call_id: {func_call['call_id']}")
-                                await openai_ws.send(json.dumps(function_output_item))
+                                    print(f"[OPENAI REALTIME] Sending function call output for call_id: {func_call['call_id']}")
+                                    await openai_ws.send(json.dumps(function_output_item))
 
-                            # Clear the buffer
-                            completed_function_calls.clear()
+                                # Clear the buffer
+                                completed_function_calls.clear()
 
-                            # Create a response to continue the conversation
-                            response_create = {
-                                "type": "response.create"
-                            }
-                            print(f"[OPENAI REALTIME] Sending response.create to continue conversation")
-                            await openai_ws.send(json.dumps(response_create))
-                        continue
-                    # ---- END TOOL CALL HANDLING ----
-
-            except Exception as e:
-                print(f"Error in send_to_twilio: {e}")
+                                # Create a response to continue the conversation
+                                response_create = {
+                                    "type": "response.create"
+                                }
+                                print(f"[OPENAI REALTIME] Sending response.create to continue conversation")
+                                await openai_ws.send(json.dumps(response_create))
+                            else:
+                                # The response is over without model audio (error or text only): don't leave filler looping
+                                if filler.active:
+                                    await stop_filler()
+                                # Between turns: drop or summarize stale items if over budget
+                                for context_event in conversation_context.prune():
+                                    await openai_ws.send(json.dumps(context_event))
+                            continue
+                        # ---- END TOOL CALL HANDLING ----
+
+                except (websockets.exceptions.ConnectionClosed, OSError) as e:
+                    print(f"OpenAI connection lost: {e}")
+                except Exception as e:
+                    print(f"Error in send_to_twilio: {e}")
+                    break
+
+                # The OpenAI stream ended while the caller is still on the line
+                if call_ended:
+                    break
+                if not await reconnect_openai():
+                    if not call_ended:
+                        print("[OPENAI RECONNECT] Giving up, ending the call")
+                        await websocket.close()
+                    break
+            await filler.stop()
 
         async def handle_speech_started_event():
             """Handle interruption when the caller's speech starts."""
-            nonlocal response_start_timestamp_twilio, last_assistant_item, outgoing_audio_buffer, user_speech_stopped_time, agent_response_started_time
+            nonlocal response_start_timestamp_twilio, last_assistant_item, outgoing_audio_buffer, user_speech_stopped_time, agent_response_started_time, response_speech_stopped_time
             print("Handling speech started event.")
             
             # Reset timing variables on interruption
             user_speech_stopped_time = None
             agent_response_started_time = None
+            response_speech_stopped_time = None
             
             # Flush any remaining audio buffer before interruption
             await flush_audio_buffer()
@@ -271,6 +350,7 @@ async def handle_media_stream(websocket: WebSocket):
                         "audio_end_ms": elapsed_time
                     }
                     await openai_ws.send(json.dumps(truncate_event))
+                    turn_detection.on_truncate(asyncio.get_event_loop().time())
 
                 await websocket.send_json({
                     "event": "clear",
@@ -283,22 +363,124 @@ async def handle_media_stream(websocket: WebSocket):
                 # Clear the audio buffer on interruption
                 outgoing_audio_buffer = bytearray()
 
+        async def forward_caller_audio(payload):
+            """Send caller audio to OpenAI, or keep it in the ring buffer while the session is being replaced."""
+            nonlocal openai_ready
+            if openai_ready:
+                audio_append = {
+                    "type": "input_audio_buffer.append",
+                    "audio": payload
+                }
+                try:
+                    await openai_ws.send(json.dumps(audio_append))
+                    return
+                except websockets.exceptions.ConnectionClosed:
+                    openai_ready = False
+            caller_audio_ring.append(payload)
+
+        async def reconnect_openai():
+            """Replace a dropped OpenAI session and resume the call without the caller noticing."""
+            nonlocal openai_ws, openai_ready, response_in_progress, last_assistant_item, response_start_timestamp_twilio, user_speech_stopped_time, agent_response_started_time, response_speech_stopped_time
+            openai_ready = False
+            reconnect_started_time = asyncio.get_event_loop().time()
+            print("[OPENAI RECONNECT] Session lost, opening a new one")
+
+            # Whatever the old session was generating is gone; let Twilio play out what it already has
+            await flush_audio_buffer()
+            last_assistant_item = None
+            response_start_timestamp_twilio = None
+            user_speech_stopped_time = None
+            agent_response_started_time = None
+            response_speech_stopped_time = None
+            arg_buffers.clear()
+            # Their call_ids belong to the old session; the results are replayed through call_state
+            resume_response = response_in_progress or bool(completed_function_calls)
+            completed_function_calls.clear()
+            response_in_progress = False
+            if openai_ws.state.name == 'OPEN':
+                await openai_ws.close()
+
+            for attempt in range(1, MAX_RECONNECT_ATTEMPTS + 1):
+                if call_ended:
+                    # The caller hung up while we were reconnecting
+                    return False
+                new_ws = None
+                try:
+                    new_ws = await openai_pool.acquire()
+                    await initialize_session(new_ws, turn_detection.turn_detection(), greet=False)
+                    for context_event in conversation_context.handoff():
+                        await new_ws.send(json.dumps(context_event))
+                    await new_ws.send(json.dumps(call_state.resume_item()))
+
+                    # Replay caller audio received during the gap
+                    replayed_frames = 0
+                    while caller_audio_ring:
+                        audio_append = {
+                            "type": "input_audio_buffer.append",
+                            "audio": caller_audio_ring.popleft()
+                        }
+                        await new_ws.send(json.dumps(audio_append))
+                        replayed_frames += 1
+                    # Go live with no await after the ring is empty, so no caller frame is left behind in it
+                    openai_ws = new_ws
+                    openai_ready = True
+                except Exception as e:
+                    print(f"[OPENAI RECONNECT] Attempt {attempt} failed: {e}")
+                    if new_ws is not None:
+                        await new_ws.close()
+                    await asyncio.sleep(RECONNECT_BACKOFF_S * attempt)
+                    continue
+
+                recovery_ms = (asyncio.get_event_loop().time() - reconnect_started_time) * 1000
+                print(f"[METRIC] openai_reconnect_recovery_ms={recovery_ms:.0f} attempt={attempt} "
+                      f"replayed_frames={replayed_frames} dropped_frames={caller_audio_ring.dropped}")
+                if resume_response:
+                    try:
+                        await openai_ws.send(json.dumps({"type": "response.create"}))
+                    except websockets.exceptions.ConnectionClosed:
+                        # The receive loop sees the closed session and reconnects again
+                        pass
+                return True
+            return False
+
+        async def apply_turn_detection_update(session_update):
+            """Send a turn detection session.update produced by the controller, if any."""
+            if session_update:
+                print('Sending turn detection update:', json.dumps(session_update))
+                await openai_ws.send(json.dumps(session_update))
+
         async def flush_audio_buffer():
             """Flush any remaining audio buffer to Twilio."""
             nonlocal outgoing_audio_buffer
             if outgoing_audio_buffer and stream_sid:
                 # Send remaining audio data as-is (no padding to avoid audio pops)
-                frame_payload = base64.b64encode(outgoing_audio_buffer).decode('utf-8')
-                audio_delta = {
-                    "event": "media",
-                    "streamSid": stream_sid,
-                    "media": {
-                        "payload": frame_payload
-                    }
-                }
-                await websocket.send_json(audio_delta)
+                await send_audio_frame(outgoing_audio_buffer)
                 outgoing_audio_buffer = bytearray()
 
+        async def send_audio_frame(frame_data):
+            """Send raw μ-law audio to Twilio as a media event."""
+            if not stream_sid:
+                return
+            audio_delta = {
+                "event": "media",
+                "streamSid": stream_sid,
+                "media": {
+                    "payload": base64.b64encode(frame_data).decode('utf-8')
+                }
+            }
+            await websocket.send_json(audio_delta)
+
+        async def stop_filler():
+            """Stop filler audio and clear whatever of it Twilio still has buffered."""
+            if await filler.stop():
+                print("[FILLER] Stopping filler audio")
+                await websocket.send_json({
+                    "event": "clear",
+                    "streamSid": stream_sid
+                })
+
+        filler = FillerPlayer(FILLER_CLIPS, send_audio_frame)
+
         async def send_mark(connection, stream_sid):
             if stream_sid:
                 mark_event = {
@@ -310,6 +492,9 @@ async def handle_media_stream(websocket: WebSocket):
                 mark_queue.append('responsePart')
 
         await asyncio.gather(receive_from_twilio(), send_to_twilio())
+    finally:
+        if openai_ws.state.name == 'OPEN':
+            await openai_ws.close()
 
 async def send_initial_conversation_item(openai_ws):
     """Send initial conversation item if AI talks first."""
@@ -330,7 +515,7 @@ async def send_initial_conversation_item(openai_ws):
     await openai_ws.send(json.dumps({"type": "response.create"}))
 
 
-async def initialize_session(openai_ws):
+async def initialize_session(openai_ws, turn_detection, greet=True):
     """Control initial session with OpenAI."""
     session_update = {
         "type": "session.update",
@@ -341,19 +526,14 @@ async def initialize_session(openai_ws):
             "audio": {
                 "input": {
                     "format": {"type": "audio/pcmu"},
+                    # Caller transcripts let old audio be summarized instead of silently dropped
+                    "transcription": {"model": INPUT_TRANSCRIPTION_MODEL},
                     # "turn_detection": { 
                     #     "type": "semantic_vad", 
                     #     "create_response": True,
                     #     "eagerness": "auto"
                     # }
-                    "turn_detection": {
-                        "type": "server_vad",
-                        "threshold": 0.5,
-                        "prefix_padding_ms": 200,
-                        "silence_duration_ms": 200,
-                        "create_response": True,
-                        "interrupt_response": True
-                    }
+                    "turn_detection": turn_detection
                 },
                 "output": {
                     "format": {"type": "audio/pcmu"},
@@ -367,19 +547,19 @@ async def initialize_session(openai_ws):
     print('Sending session update:', json.dumps(session_update))
     await openai_ws.send(json.dumps(session_update))
 
-    # Uncomment the next line to have the AI speak first
-    await send_initial_conversation_item(openai_ws)
+    # Have the AI speak first (not when resuming an ongoing call on a fresh session)
+    if greet:
+        await send_initial_conversation_item(openai_ws)
 
 
-arg_buffers = defaultdict(list)
-completed_function_calls = []  # Buffer for function calls waiting for response.done
+tool_runner = ResilientToolRunner()  # Shared across calls so circuit breakers see every backend failure
 
 async def route_tool_call(name: str, args: dict):
     """Route tool calls to our function handlers."""
     print(f"[OPENAI REALTIME] Tool call received: {name}")
     print(f"[OPENAI REALTIME] Tool arguments: {args}")
 
-    result, error = handle_function_call(name, args)
+    result, error = await tool_runner.call(name, args)
 
     if result is not None:
         print(f"[OPENAI REALTIME] Tool call successful: {result}")
@@ -388,6 +568,22 @@ async def route_tool_call(name: str, args: dict):
         print(f"[OPENAI REALTIME] Tool call failed: {error}")
         return {"error": error}
 
+def select_runtime():
+    """Pick uvloop/httptools when installed, falling back to the pure-Python asyncio/h11 stack."""
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+    return loop, http
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=PORT)
+    loop, http = select_runtime()
+    print(f"Starting server with loop={loop} http={http}")
+    uvicorn.run(app, host="0.0.0.0", port=PORT, loop=loop, http=http)
@@ -0,0 +1,130 @@
+"""
+OpenAI Realtime connection management: warm connection pool, caller audio ring
+buffer and the per-call state replayed into a fresh session after a reconnect.
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+import websockets
+
+# Caller audio kept while the OpenAI session is down (Twilio sends 20ms frames)
+AUDIO_RING_FRAMES = 500  # 10 seconds
+# Warm connections older than this are discarded rather than handed out
+WARM_CONNECTION_MAX_AGE_S = 300
+# Tool results carried over into a resumed session
+RECENT_TOOL_RESULTS = 5
+
+
+class RealtimeConnectionPool:
+    """
+    Keeps `size` pre-opened realtime websockets so a call (or a reconnect) does not
+    pay the connection handshake. With size 0 every acquire opens a new connection.
+    """
+
+    def __init__(self, url, headers, size=1):
+        self.url = url
+        self.headers = headers
+        self.size = size
+        self.idle = deque()  # (opened_at, connection)
+        self.refilling = None
+
+    async def connect(self):
+        return await websockets.connect(self.url, additional_headers=self.headers)
+
+    async def acquire(self):
+        """Return an open connection, preferring a warm one, and top the pool back up."""
+        connection = None
+        while self.idle and connection is None:
+            opened_at, candidate = self.idle.popleft()
+            if candidate.state.name == 'OPEN' and time.monotonic() - opened_at < WARM_CONNECTION_MAX_AGE_S:
+                connection = candidate
+            else:
+                await candidate.close()
+
+        if connection is None:
+            connection = await self.connect()
+        else:
+            print("[OPENAI POOL] Using warm connection")
+
+        if self.size and (self.refilling is None or self.refilling.done()):
+            self.refilling = asyncio.ensure_future(self._refill())
+        return connection
+
+    async def _refill(self):
+        while len(self.idle) < self.size:
+            try:
+                connection = await self.connect()
+            except Exception as e:
+                print(f"[OPENAI POOL] Could not open warm connection: {e}")
+                return
+            self.idle.append((time.monotonic(), connection))
+
+
+class AudioRingBuffer:
+    """Bounded buffer of base64 caller audio frames; the oldest frames are dropped when full."""
+
+    def __init__(self, max_frames=AUDIO_RING_FRAMES):
+        self.frames = deque(maxlen=max_frames)
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    def append(self, payload):
+        if len(self.frames) == self.frames.maxlen:
+            self.dropped += 1
+        self.frames.append(payload)
+
+    def popleft(self):
+        return self.frames.popleft()
+
+
+class CallState:
+    """Facts about the call that must survive a session reconnect."""
+
+    def __init__(self):
+        self.verified_customer = None
+        self.recent_tool_results = deque(maxlen=RECENT_TOOL_RESULTS)
+
+    def record_tool_result(self, tool_name, args, result):
+        """Remember a (projected) tool result and any identity verification it carries."""
+        self.recent_tool_results.append({"tool": tool_name, "arguments": args, "result": result})
+        # A successful customer lookup or order lookup counts as identity verification
+        verifies_identity = tool_name.startswith('get_customer_by_') or tool_name == 'get_order'
+        if not (verifies_identity and isinstance(result, dict) and result.get('success')):
+            return
+        customer_name = (result.get('customer') or {}).get('name')
+        if customer_name or not self.verified_customer:
+            self.verified_customer = customer_name or 'the caller'
+
+    def resume_item(self):
+        """`conversation.item.create` event restoring verification state and recent tool results."""
+        if self.verified_customer:
+            verification = f"The caller's identity is already verified as {self.verified_customer}. Do not ask them to verify again."
+        else:
+            verification = "The caller's identity has not been verified yet."
+
+        lines = [
+            "The call is continuing after a brief technical interruption that the caller did not notice. "
+            "Carry on naturally without greeting the caller again.",
+            verification
+        ]
+        if self.recent_tool_results:
+            lines.append("Recent tool results:")
+            lines.extend(json.dumps(entry) for entry in self.recent_tool_results)
+
+        return {
+            "type": "conversation.item.create",
+            "item": {
+                "type": "message",
+                "role": "system",
+                "content": [
+                    {
+                        "type": "input_text",
+                        "text": "\n".join(lines)
+                    }
+                ]
+            }
+        }
@@ -0,0 +1,235 @@
+"""
+Resilience layer around the tool registry.
+
+Wraps `handle_function_call` with, per tool:
+- a deadline, so the caller never waits on a hung backend
+- a hedged duplicate request after the observed p95 latency, to cut tail latency
+- a circuit breaker that fails fast while a backend is unhealthy
+- its own bounded worker pool, so threads stuck on one hung backend cannot starve the others
+
+Failures surface to the model as a regular result telling it the system is
+unavailable, so it can tell the caller instead of going silent.
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from function_handlers import handle_function_call
+
+# Latency budget applied to tools without their own entry
+DEFAULT_BUDGET = {
+    "deadline_s": 3.0,           # give up and answer "unavailable" after this long
+    "hedge": True,               # only for idempotent (read-only) tools
+    "hedge_delay_s": 0.5,        # used until enough samples exist for a p95
+    "failure_threshold": 3,      # consecutive failures that open the circuit
+    "reset_timeout_s": 30.0,     # how long the circuit stays open before a trial call
+    "max_in_flight": 4,          # backend calls (hedges included) allowed to run at once
+}
+
+# Per-tool overrides of DEFAULT_BUDGET
+TOOL_LATENCY_BUDGETS = {
+    "get_customer_by_email": {"deadline_s": 2.0},
+    "get_customer_by_phone": {"deadline_s": 2.0},
+    "get_order": {"deadline_s": 3.0},
+    "check_inventory": {"deadline_s": 2.5},
+}
+
+LATENCY_WINDOW = 50
+MIN_SAMPLES_FOR_P95 = 10
+
+
+def unavailable_result(tool_name, reason):
+    """Model-friendly result for a tool whose backend could not answer."""
+    return {
+        "success": False,
+        "error": "system_unavailable",
+        "reason": reason,
+        "message": (
+            f"The system behind {tool_name} is temporarily unavailable. "
+            "Apologize to the caller, and offer to try again in a moment or help with something else."
+        )
+    }
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker: closed -> open -> half-open -> closed."""
+
+    def __init__(self, failure_threshold, reset_timeout_s, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self):
+        """Whether a call may go through right now."""
+        if self.state == "open":
+            if self.clock() - self.opened_at < self.reset_timeout_s:
+                return False
+            # Let a single trial call through
+            self.state = "half_open"
+            return True
+        if self.state == "half_open":
+            # A trial call is already in flight
+            return False
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = self.clock()
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies for one tool."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+
+    def record(self, latency_s):
+        self.samples.append(latency_s)
+
+    def p95(self):
+        if len(self.samples) < MIN_SAMPLES_FOR_P95:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class ResilientToolRunner:
+    """
+    Runs tool calls with deadlines, hedging and circuit breakers.
+
+    `handler` has the same contract as `handle_function_call`: a blocking
+    `(function_name, arguments_dict) -> (result, error)` callable. It is run in a
+    per-tool worker pool so slow backends never block the event loop. A thread cannot
+    be cancelled, so attempts abandoned at the deadline keep counting against the
+    tool's `max_in_flight` until the backend actually returns.
+    """
+
+    def __init__(self, handler=handle_function_call, budgets=None, clock=time.monotonic):
+        self.handler = handler
+        self.budgets = TOOL_LATENCY_BUDGETS if budgets is None else budgets
+        self.clock = clock
+        self.breakers = {}
+        self.latencies = {}
+        self.executors = {}
+        self.in_flight = {}
+
+    def budget(self, name):
+        return {**DEFAULT_BUDGET, **self.budgets.get(name, {})}
+
+    def breaker(self, name):
+        if name not in self.breakers:
+            budget = self.budget(name)
+            self.breakers[name] = CircuitBreaker(budget["failure_threshold"], budget["reset_timeout_s"], self.clock)
+        return self.breakers[name]
+
+    def hedge_delay(self, name):
+        """Delay before a duplicate request: observed p95, capped below the deadline."""
+        budget = self.budget(name)
+        tracker = self.latencies.get(name)
+        p95 = tracker.p95() if tracker else None
+        delay = p95 if p95 is not None else budget["hedge_delay_s"]
+        return min(delay, budget["deadline_s"] * 0.8)
+
+    def has_capacity(self, name):
+        return self.in_flight.get(name, 0) < self.budget(name)["max_in_flight"]
+
+    async def call(self, name, args):
+        """
+        Run a tool call through the resilience layer.
+
+        Returns:
+            tuple: (result dict or None, error message or None)
+        """
+        # Checked before the breaker so a half-open trial is never granted and then dropped
+        if not self.has_capacity(name):
+            print(f"[TOOL RESILIENCE] {name}: {self.in_flight[name]} backend calls still running, failing fast")
+            return unavailable_result(name, "overloaded"), None
+
+        breaker = self.breaker(name)
+        if not breaker.allow():
+            print(f"[TOOL RESILIENCE] {name}: circuit open, failing fast")
+            return unavailable_result(name, "circuit_open"), None
+
+        budget = self.budget(name)
+        deadline = self.clock() + budget["deadline_s"]
+        attempts = [self._start_attempt(name, args)]
+        last_error = None
+
+        try:
+            while True:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    break
+
+                pending = [attempt for attempt in attempts if not attempt.done()]
+                can_hedge = budget["hedge"] and len(attempts) == 1 and self.has_capacity(name)
+                timeout = min(remaining, self.hedge_delay(name)) if can_hedge else remaining
+                if pending:
+                    await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for attempt in attempts:
+                    if not attempt.done():
+                        continue
+                    result, error = attempt.result()
+                    if error is None:
+                        breaker.record_success()
+                        return result, None
+                    last_error = error
+
+                if all(attempt.done() for attempt in attempts):
+                    break
+                if can_hedge and self.clock() < deadline and self.has_capacity(name):
+                    print(f"[TOOL RESILIENCE] {name}: no answer after {timeout:.2f}s, sending hedged request")
+                    attempts.append(self._start_attempt(name, args))
+        finally:
+            for attempt in attempts:
+                if not attempt.done():
+                    attempt.cancel()
+
+        breaker.record_failure()
+        if last_error is not None and all(attempt.done() for attempt in attempts):
+            print(f"[TOOL RESILIENCE] {name}: failed ({last_error}), circuit {breaker.state}")
+            return None, last_error
+
+        print(f"[TOOL RESILIENCE] {name}: deadline of {budget['deadline_s']:.2f}s exceeded, circuit {breaker.state}")
+        return unavailable_result(name, "timeout"), None
+
+    def _start_attempt(self, name, args):
+        """Submit one request to the tool's worker pool; it counts as in flight until the thread returns."""
+        if name not in self.executors:
+            self.executors[name] = ThreadPoolExecutor(
+                max_workers=self.budget(name)["max_in_flight"],
+                thread_name_prefix=f"tool-{name}"
+            )
+        loop = asyncio.get_running_loop()
+        self.in_flight[name] = self.in_flight.get(name, 0) + 1
+
+        def finished(_):
+            self.in_flight[name] -= 1
+
+        future = self.executors[name].submit(self.handler, name, args)
+        # Runs in the worker thread when the backend finally returns, even if the attempt was abandoned
+        future.add_done_callback(lambda done: loop.call_soon_threadsafe(finished, done))
+        return asyncio.ensure_future(self._attempt(name, future))
+
+    async def _attempt(self, name, future):
+        """Wait for one backend request; records latency on success."""
+        start = self.clock()
+        try:
+            result, error = await asyncio.wrap_future(future)
+        except Exception as e:
+            return None, f"Error executing {name}: {e}"
+        if error is None:
+            self.latencies.setdefault(name, LatencyTracker()).record(self.clock() - start)
+        return result, error
@@ -0,0 +1,194 @@
+"""
+Per-call adaptive turn detection for the OpenAI Realtime API.
+
+The controller watches VAD events, interruptions and response latency for a single
+call and nudges the server_vad parameters (within configured bounds) through
+`session.update`. Every decision is logged as a single JSON line so policies can be
+replayed and evaluated offline.
+"""
+
+import json
+
+# Starting point for every call (matches the previous hard-coded session config)
+VAD_DEFAULTS = {
+    "threshold": 0.5,
+    "prefix_padding_ms": 200,
+    "silence_duration_ms": 200,
+}
+
+# Hard limits the controller will never leave
+VAD_BOUNDS = {
+    "threshold": (0.4, 0.8),
+    "prefix_padding_ms": (100, 500),
+    "silence_duration_ms": (150, 800),
+}
+
+# Adjustment step per decision
+VAD_STEPS = {
+    "threshold": 0.05,
+    "prefix_padding_ms": 50,
+    "silence_duration_ms": 50,
+}
+
+# Speech shorter than this after a barge-in is treated as noise / a false interruption
+MIN_UTTERANCE_MS = 400
+# Caller resuming speech this soon after speech_stopped means we cut them off mid-sentence
+PREMATURE_TURN_END_MS = 700
+# Target time from the caller going silent to the first agent audio (silence window included)
+TARGET_RESPONSE_MS = 900
+# Clean turns required before relaxing the threshold back towards the default
+CLEAN_TURNS_TO_RELAX = 3
+
+
+def build_turn_detection(params):
+    """Build the server_vad `turn_detection` block for the given parameters."""
+    return {
+        "type": "server_vad",
+        "threshold": params["threshold"],
+        "prefix_padding_ms": params["prefix_padding_ms"],
+        "silence_duration_ms": params["silence_duration_ms"],
+        "create_response": True,
+        "interrupt_response": True
+    }
+
+
+class TurnDetectionController:
+    """
+    Adapts VAD parameters for one call.
+
+    All `on_*` methods take timestamps in seconds (the event loop clock) and return
+    a `session.update` event dict when the parameters changed, otherwise None.
+    With `adaptive=False` (shadow mode) decisions are only logged: `params` holds the
+    proposed values while `applied_params` stays what the session actually uses.
+    """
+
+    def __init__(self, call_id=None, defaults=None, bounds=None, steps=None, adaptive=True):
+        self.call_id = call_id
+        self.adaptive = adaptive
+        self.params = dict(defaults or VAD_DEFAULTS)
+        self.applied_params = dict(self.params)
+        self.bounds = bounds or VAD_BOUNDS
+        self.steps = steps or VAD_STEPS
+
+        self.speech_started_at = None
+        self.speech_stopped_at = None
+        self.interrupted_agent = False
+        self.clean_turns = 0
+        self.false_interruptions = 0
+        self.premature_turn_ends = 0
+
+    def turn_detection(self):
+        """`turn_detection` block the session should use, e.g. for the initial session.update."""
+        return build_turn_detection(self.applied_params)
+
+    def on_speech_started(self, now):
+        """Caller speech detected. Resuming right after a turn ended means we cut them off."""
+        self.speech_started_at = now
+        self.interrupted_agent = False
+
+        if self.speech_stopped_at is not None:
+            gap_ms = (now - self.speech_stopped_at) * 1000
+            self.speech_stopped_at = None
+            if gap_ms < PREMATURE_TURN_END_MS:
+                self.premature_turn_ends += 1
+                self.clean_turns = 0
+                return self._adjust(
+                    "premature_turn_end",
+                    {"silence_duration_ms": +1},
+                    gap_ms=round(gap_ms)
+                )
+        return None
+
+    def on_truncate(self, now):
+        """The caller barged in and the agent's audio was truncated."""
+        self.interrupted_agent = True
+        return None
+
+    def on_speech_stopped(self, now):
+        """Caller speech ended. A short burst that interrupted the agent is a false barge-in."""
+        self.speech_stopped_at = None
+        if self.speech_started_at is None:
+            return None
+
+        duration_ms = (now - self.speech_started_at) * 1000
+        interrupted_agent = self.interrupted_agent
+        self.speech_started_at = None
+        self.interrupted_agent = False
+
+        # Only a real utterance can be cut off; short bursts (noise) must not arm premature_turn_end
+        if duration_ms >= MIN_UTTERANCE_MS:
+            self.speech_stopped_at = now
+        elif interrupted_agent:
+            self.false_interruptions += 1
+            self.clean_turns = 0
+            return self._adjust(
+                "false_interruption",
+                {"threshold": +1, "prefix_padding_ms": +1},
+                duration_ms=round(duration_ms)
+            )
+        return None
+
+    def on_response_latency(self, latency_s):
+        """First agent audio arrived `latency_s` after speech_stopped."""
+        # The measured latency starts after the VAD silence window has already elapsed
+        response_ms = latency_s * 1000 + self.applied_params["silence_duration_ms"]
+        # Any speech_started from here on is a barge-in, not a resumed turn
+        self.speech_stopped_at = None
+        self.clean_turns += 1
+
+        if response_ms > TARGET_RESPONSE_MS:
+            return self._adjust(
+                "slow_response",
+                {"silence_duration_ms": -1},
+                response_ms=round(response_ms)
+            )
+        if self.clean_turns >= CLEAN_TURNS_TO_RELAX and self.params["threshold"] > VAD_DEFAULTS["threshold"]:
+            self.clean_turns = 0
+            return self._adjust(
+                "relax_threshold",
+                {"threshold": -1},
+                response_ms=round(response_ms)
+            )
+        return None
+
+    def _adjust(self, reason, directions, **details):
+        """Step each parameter in `directions` (+1/-1), clamp to bounds and build the update."""
+        previous = dict(self.params)
+        for name, direction in directions.items():
+            low, high = self.bounds[name]
+            value = self.params[name] + direction * self.steps[name]
+            value = min(max(value, low), high)
+            self.params[name] = round(value, 2) if isinstance(value, float) else value
+
+        changed = self.params != previous
+        self._log_decision(reason, previous, changed, details)
+        if not changed or not self.adaptive:
+            return None
+
+        self.applied_params = dict(self.params)
+
+        return {
+            "type": "session.update",
+            "session": {
+                "type": "realtime",
+                "audio": {
+                    "input": {
+                        "turn_detection": self.turn_detection()
+                    }
+                }
+            }
+        }
+
+    def _log_decision(self, reason, previous, changed, details):
+        decision = {
+            "call_id": self.call_id,
+            "reason": reason,
+            "changed": changed,
+            "applied": changed and self.adaptive,
+            "previous": previous,
+            "params": self.params,
+            "false_interruptions": self.false_interruptions,
+            "premature_turn_ends": self.premature_turn_ends,
+            **details
+        }
+        print(f"[VAD DECISION] {json.dumps(decision)}")